@@ -8,6 +8,13 @@ __version__ = "1.0.0"
 __author__ = "aXaTT Team"
 __email__ = "team@axatt.dev"
 
-from . import server
+__all__ = ["server"]
 
-__all__ = ["server"] 
\ No newline at end of file
+
+def __getattr__(name):
+    # Import the server (and with it FastMCP) only when it is actually used,
+    # so importing the models or the client stays cheap
+    if name == "server":
+        import importlib
+        return importlib.import_module(f"{__name__}.server")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}") 
\ No newline at end of file
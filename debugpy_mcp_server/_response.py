@@ -0,0 +1,98 @@
+"""
+Serialization of tool results into the JSON text returned to MCP clients.
+"""
+
+import functools
+import os
+from typing import Any, Callable, Type
+
+import orjson
+from pydantic import BaseModel, TypeAdapter
+
+# Responses are read by programs, so they are compact unless pretty output is requested
+_PRETTY = os.environ.get("DEBUGPY_MCP_PRETTY") == "1"
+
+_JSON_OPTIONS = orjson.OPT_INDENT_2 if _PRETTY else 0
+_MODEL_INDENT = 2 if _PRETTY else None
+
+# Failure responses have a fixed shape, so only the message needs encoding
+if _PRETTY:
+    _FAILURE_TEMPLATE = '{\n  "success": false,\n  "error": %s\n}'
+else:
+    _FAILURE_TEMPLATE = '{"success":false,"error":%s}'
+
+
+def _json_default(obj: Any) -> Any:
+    """Serialize values orjson does not handle natively, such as models."""
+    if isinstance(obj, BaseModel):
+        if _PRETTY:
+            # Fragments are embedded verbatim and would not be indented, so
+            # fall back to JSON-ready primitives for orjson to lay out
+            return obj.model_dump(mode="json")
+        # pydantic-core writes the model's JSON in one pass and orjson splices
+        # it in as-is, instead of building a dict only to walk it again
+        return orjson.Fragment(obj.model_dump_json())
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+@functools.singledispatch
+def format_response(data: Any) -> str:
+    """Format response data for MCP tool output.
+    
+    Dispatches on the payload type; anything without a JSON handler is
+    returned as str(data).
+    """
+    try:
+        return str(data)
+    except Exception as e:
+        return f"Error formatting response: {e}"
+
+
+@format_response.register(BaseModel)
+def _format_model(data: BaseModel) -> str:
+    """Format a model payload, serialized directly by pydantic-core."""
+    try:
+        return data.model_dump_json(indent=_MODEL_INDENT)
+    except Exception as e:
+        return f"Error formatting response: {e}"
+
+
+@format_response.register(dict)
+@format_response.register(list)
+def _format_json(data: Any) -> str:
+    """Format a JSON payload.
+    
+    Models may be passed as-is, including inside dicts and lists; orjson
+    calls back into _json_default for each one it meets.
+    """
+    try:
+        return orjson.dumps(data, default=_json_default, option=_JSON_OPTIONS).decode()
+    except Exception as e:
+        return f"Error formatting response: {e}"
+
+
+def response_serializer(model_type: Type[BaseModel]) -> Callable[[BaseModel], str]:
+    """Return a serializer bound to one response model type.
+    
+    For tools whose response shape is known statically; calling it skips
+    format_response's type dispatch.
+    """
+    dump_json = TypeAdapter(model_type).dump_json
+    
+    def serialize(data: BaseModel) -> str:
+        return dump_json(data, indent=_MODEL_INDENT).decode()
+    
+    return serialize
+
+
+def format_success(**fields: Any) -> str:
+    """Format a successful response; "success" always comes first."""
+    return _format_json({"success": True, **fields})
+
+
+def format_error(error: Any) -> str:
+    """Format a failure response carrying only an error message.
+    
+    Produces the same text as format_response({"success": False, "error": str(error)}).
+    """
+    return _FAILURE_TEMPLATE % orjson.dumps(str(error)).decode()
@@ -2,16 +2,143 @@
 Debug Adapter Protocol (DAP) client implementation for debugpy.
 """
 
-import json
+import selectors
 import socket
 import threading
 import time
-import uuid
-from typing import Any, Dict, List, Optional, Callable
+from typing import Any, Dict, List, Optional, Callable, Tuple, Union
 import logging
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
+# Upper bound on idle response slots kept for reuse per client
+_SLOT_POOL_SIZE = 64
+
+# In-flight requests are tracked in a fixed ring indexed by seq & _RING_MASK,
+# which bounds how many requests one client can have outstanding
+_RING_SIZE = 1024
+_RING_MASK = _RING_SIZE - 1
+
+# DAP traffic is small request/response pairs, so favour latency over batching
+_SOCKET_BUFFER_SIZE = 256 * 1024
+_TCP_QUICKACK = getattr(socket, "TCP_QUICKACK", None)  # Linux only
+
+# DAP base protocol framing
+_CONTENT_LENGTH = b"Content-Length: "
+_HEADER_END = b"\r\n\r\n"
+
+
+def _preencode_request(command: str, arguments: Dict[str, Any]) -> bytes:
+    """Serialize a request with constant arguments, leaving out its seq.
+    
+    The result can be passed to _send_request in place of the arguments
+    dict; only the sequence number is spliced in at send time.
+    """
+    encoded = orjson.dumps({"type": "request", "command": command, "arguments": arguments})
+    return encoded[1:]  # drop the opening brace, which precedes "seq"
+
+
+_INITIALIZE_REQUEST = _preencode_request("initialize", {
+    "clientID": "debugpy-mcp-server",
+    "clientName": "Debugpy MCP Server",
+    "adapterID": "python",
+    "pathFormat": "path",
+    "linesStartAt1": True,
+    "columnsStartAt1": True,
+    "supportsVariableType": True,
+    "supportsVariablePaging": True,
+    "supportsRunInTerminalRequest": False,
+    "supportsMemoryReferences": False,
+    "supportsProgressReporting": False,
+    "supportsInvalidatedEvent": False
+})
+
+
+class _Slot:
+    """Single-shot handoff of one DAP response from the dispatcher thread."""
+    
+    __slots__ = ("seq", "event", "result")
+    
+    def __init__(self):
+        self.seq = -1
+        self.event = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+
+
+class _Dispatcher:
+    """Single thread that reads the sockets of every connected DAPClient.
+    
+    Sockets are multiplexed with the platform's default selector (epoll on
+    Linux), so open sessions share one receive thread instead of one each.
+    """
+    
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        # Written to after (un)registering so a blocked select() picks up the change
+        self._wake_reader, self._wake_writer = socket.socketpair()
+        self._wake_reader.setblocking(False)
+        self._wake_writer.setblocking(False)
+        self._selector.register(self._wake_reader, selectors.EVENT_READ, None)
+    
+    def register(self, client: "DAPClient"):
+        """Start dispatching reads for a connected client."""
+        with self._lock:
+            self._selector.register(client.socket, selectors.EVENT_READ, client)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="dap-dispatcher", daemon=True)
+                self._thread.start()
+        self._wake()
+    
+    def unregister(self, sock: socket.socket):
+        """Stop dispatching reads for a socket."""
+        with self._lock:
+            try:
+                self._selector.unregister(sock)
+            except (KeyError, ValueError):
+                pass
+        self._wake()
+    
+    def _wake(self):
+        try:
+            self._wake_writer.send(b"\0")
+        except OSError:
+            pass  # a wake-up is already pending
+    
+    def _run(self):
+        while True:
+            for key, _ in self._selector.select():
+                client = key.data
+                if client is None:
+                    try:
+                        self._wake_reader.recv(4096)
+                    except OSError:
+                        pass
+                    continue
+                    
+                try:
+                    client._on_readable()
+                except Exception as e:
+                    if client.is_connected:
+                        logger.error("Error in receive loop: %s", e)
+                    client._close_receive(key.fileobj)
+
+
+_dispatcher: Optional[_Dispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def _get_dispatcher() -> _Dispatcher:
+    """Return the shared dispatcher, creating it on first use."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = _Dispatcher()
+        return _dispatcher
+
 
 class DAPClient:
     """Debug Adapter Protocol client for communicating with debugpy."""
@@ -19,43 +146,36 @@ class DAPClient:
     def __init__(self):
         self.socket: Optional[socket.socket] = None
         self.sequence_number = 1
-        self.pending_requests: Dict[int, threading.Event] = {}
-        self.responses: Dict[int, Dict[str, Any]] = {}
+        self._slots: List[Optional[_Slot]] = [None] * _RING_SIZE
         self.event_callbacks: Dict[str, Callable] = {}
         self.is_connected = False
-        self.receive_thread: Optional[threading.Thread] = None
         self.lock = threading.Lock()
+        # Tools call in from several worker threads, and sendall may write a
+        # batch in pieces, so frames must not interleave on the socket
+        self._send_lock = threading.Lock()
         self.threads: List[Dict[str, Any]] = []
         self.main_thread_id: Optional[int] = None
+        self._slot_pool: List[_Slot] = []
+        self._rx_buf = bytearray()
         
     def connect(self, host: str, port: int, timeout: int = 30) -> bool:
         """Connect to the debug adapter."""
+        connected = False
         try:
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, _SOCKET_BUFFER_SIZE)
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, _SOCKET_BUFFER_SIZE)
             self.socket.settimeout(timeout)
             self.socket.connect((host, port))
             
             self.is_connected = True
             
-            # Start receiving thread
-            self.receive_thread = threading.Thread(target=self._receive_loop, daemon=True)
-            self.receive_thread.start()
+            # Hand the socket to the shared receive thread
+            _get_dispatcher().register(self)
             
             # Send initialize request
-            response = self._send_request("initialize", {
-                "clientID": "debugpy-mcp-server",
-                "clientName": "Debugpy MCP Server",
-                "adapterID": "python",
-                "pathFormat": "path",
-                "linesStartAt1": True,
-                "columnsStartAt1": True,
-                "supportsVariableType": True,
-                "supportsVariablePaging": True,
-                "supportsRunInTerminalRequest": False,
-                "supportsMemoryReferences": False,
-                "supportsProgressReporting": False,
-                "supportsInvalidatedEvent": False
-            })
+            response = self._send_request("initialize", _INITIALIZE_REQUEST)
             
             if response and response.get("success"):
                 # Send configuration done - debugpy handles attach automatically when initialized
@@ -70,20 +190,29 @@ class DAPClient:
                             self.main_thread_id = self.threads[0].get("id", 1)
                         else:
                             self.main_thread_id = 1  # fallback
-                        logger.info(f"Connected with {len(self.threads)} threads, main thread ID: {self.main_thread_id}")
-                        return True
+                        logger.info("Connected with %s threads, main thread ID: %s", len(self.threads), self.main_thread_id)
                     else:
                         # If threads request fails, still try to use default thread ID
                         self.main_thread_id = 1
                         logger.warning("Could not get threads list, using default thread ID 1")
-                        return True
+                    connected = True
+                    return True
                     
             return False
             
         except Exception as e:
-            logger.error(f"Failed to connect to DAP server: {e}")
-            self.is_connected = False
+            logger.error("Failed to connect to DAP server: %s", e)
             return False
+        
+        finally:
+            if not connected:
+                # The dispatcher holds the client as key data, so a socket
+                # left registered would keep both alive for good
+                self.is_connected = False
+                if self.socket:
+                    _get_dispatcher().unregister(self.socket)
+                    self.socket.close()
+                    self.socket = None
     
     def disconnect(self):
         """Disconnect from the debug adapter."""
@@ -93,13 +222,11 @@ class DAPClient:
             if self.socket:
                 # Send disconnect request
                 self._send_request("disconnect", {"restart": False})
+                _get_dispatcher().unregister(self.socket)
                 self.socket.close()
                 self.socket = None
         except:
             pass
-            
-        if self.receive_thread and self.receive_thread.is_alive():
-            self.receive_thread.join(timeout=1)
     
     def set_breakpoints(self, file_path: str, lines: List[int], 
                        conditions: Optional[List[Optional[str]]] = None) -> Dict[str, Any]:
@@ -121,9 +248,9 @@ class DAPClient:
         if thread_id is None:
             thread_id = self.main_thread_id or 1
         
-        logger.info(f"Sending continue command with thread_id: {thread_id}")
+        logger.debug("Sending continue command with thread_id: %s", thread_id)
         response = self._send_request("continue", {"threadId": thread_id})
-        logger.info(f"Continue response: {response}")
+        logger.debug("Continue response: %s", response)
         return response
     
     def step_over(self, thread_id: Optional[int] = None) -> Dict[str, Any]:
@@ -173,91 +300,166 @@ class DAPClient:
         """Get available threads."""
         return self._send_request("threads", {})
     
-    def _send_request(self, command: str, arguments: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    def _send_request(self, command: str,
+                      arguments: Union[Dict[str, Any], bytes]) -> Optional[Dict[str, Any]]:
         """Send a DAP request and wait for response."""
+        return self._send_requests([(command, arguments)])[0]
+    
+    def _send_requests(self, requests: List[Tuple[str, Union[Dict[str, Any], bytes]]]
+                       ) -> List[Optional[Dict[str, Any]]]:
+        """Send several DAP requests in one write and wait for all responses.
+        
+        Arguments are either a dict or a request pre-encoded with
+        _preencode_request. Responses are returned in the same order as the
+        requests; an entry is None if that request timed out or could not
+        be sent.
+        """
         if not self.is_connected or not self.socket:
-            return None
+            return [None] * len(requests)
             
         with self.lock:
-            seq = self.sequence_number
-            self.sequence_number += 1
-        
-        request = {
-            "seq": seq,
-            "type": "request",
-            "command": command,
-            "arguments": arguments
-        }
+            first_seq = self.sequence_number
+            self.sequence_number += len(requests)
         
-        # Prepare to wait for response
-        event = threading.Event()
-        self.pending_requests[seq] = event
+        slots = []
+        frames = []
+        for seq, (command, arguments) in enumerate(requests, first_seq):
+            if isinstance(arguments, bytes):
+                body = b'{"seq":%d,' % seq + arguments
+            else:
+                request = {
+                    "seq": seq,
+                    "type": "request",
+                    "command": command,
+                    "arguments": arguments
+                }
+                body = orjson.dumps(request)
+            frames += (_CONTENT_LENGTH, str(len(body)).encode(), _HEADER_END, body)
+            
+            # Prepare to wait for response
+            slot = self._acquire_slot(seq)
+            self._slots[seq & _RING_MASK] = slot
+            slots.append(slot)
         
+        responses: List[Optional[Dict[str, Any]]] = [None] * len(requests)
         try:
-            # Send request
-            message = json.dumps(request)
-            content = f"Content-Length: {len(message)}\r\n\r\n{message}"
-            self.socket.send(content.encode('utf-8'))
+            # Send all requests with a single syscall
+            payload = b"".join(frames)
+            with self._send_lock:
+                self.socket.sendall(payload)
             
-            # Wait for response
-            if event.wait(timeout=10):
-                response = self.responses.pop(seq, None)
-                return response
-            else:
-                logger.error(f"Timeout waiting for response to {command}")
-                return None
-                
+            # Wait for responses; they share one deadline since they are in flight together
+            deadline = time.monotonic() + 10
+            for i, slot in enumerate(slots):
+                if slot.event.wait(timeout=max(0, deadline - time.monotonic())):
+                    responses[i] = slot.result
+                else:
+                    logger.error("Timeout waiting for response to %s", requests[i][0])
+                    
         except Exception as e:
-            logger.error(f"Error sending request {command}: {e}")
-            return None
+            commands = ", ".join(command for command, _ in requests)
+            logger.error("Error sending request %s: %s", commands, e)
         finally:
-            self.pending_requests.pop(seq, None)
+            for slot in slots:
+                # Unclaimed slots leave the ring so a late response is discarded
+                index = slot.seq & _RING_MASK
+                if self._slots[index] is slot:
+                    self._slots[index] = None
+                # A timed-out slot may still be filled by a late response, so only
+                # slots that have already fired are safe to hand out again
+                if slot.event.is_set():
+                    self._release_slot(slot)
+        
+        return responses
+    
+    def _acquire_slot(self, seq: int) -> _Slot:
+        """Take a reset response slot from the pool, or create one."""
+        try:
+            slot = self._slot_pool.pop()
+        except IndexError:
+            slot = _Slot()
+        else:
+            slot.result = None
+            slot.event.clear()
+        slot.seq = seq
+        return slot
     
-    def _receive_loop(self):
-        """Receive and process DAP messages."""
-        buffer = b""
+    def _release_slot(self, slot: _Slot):
+        """Return a fired response slot to the pool."""
+        if len(self._slot_pool) < _SLOT_POOL_SIZE:
+            self._slot_pool.append(slot)
+    
+    def _on_readable(self):
+        """Read available data and process every complete DAP message.
         
-        while self.is_connected and self.socket:
-            try:
-                data = self.socket.recv(4096)
-                if not data:
-                    break
-                    
-                buffer += data
-                
-                # Process complete messages
-                while b'\r\n\r\n' in buffer:
-                    header_end = buffer.find(b'\r\n\r\n')
-                    header = buffer[:header_end].decode('utf-8')
-                    
-                    # Parse Content-Length
-                    content_length = 0
-                    for line in header.split('\r\n'):
-                        if line.startswith('Content-Length:'):
-                            content_length = int(line.split(':')[1].strip())
-                            break
-                    
-                    if len(buffer) >= header_end + 4 + content_length:
-                        # We have a complete message
-                        content_start = header_end + 4
-                        content_end = content_start + content_length
-                        content = buffer[content_start:content_end].decode('utf-8')
-                        buffer = buffer[content_end:]
-                        
-                        # Process the message
-                        try:
-                            message = json.loads(content)
-                            self._handle_message(message)
-                        except json.JSONDecodeError as e:
-                            logger.error(f"Failed to parse DAP message: {e}")
-                    else:
-                        # Wait for more data
+        Called on the dispatcher thread when the socket is readable.
+        """
+        sock = self.socket
+        if sock is None:
+            return
+            
+        data = sock.recv(65536)
+        if not data:
+            # The adapter closed the connection
+            self._close_receive(sock)
+            return
+        
+        # Quick-ack mode is cleared by the kernel, so re-arm it after each read
+        if _TCP_QUICKACK is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, _TCP_QUICKACK, 1)
+            
+        buffer = self._rx_buf
+        buffer.extend(data)
+        
+        # Process complete messages
+        header_end = buffer.find(_HEADER_END)
+        while header_end >= 0:
+            # Parse Content-Length; debugpy sends it as the only header
+            if buffer.startswith(_CONTENT_LENGTH) and buffer.find(b'\r\n', len(_CONTENT_LENGTH)) == header_end:
+                content_length = int(buffer[len(_CONTENT_LENGTH):header_end])
+            else:
+                content_length = 0
+                for line in buffer[:header_end].split(b'\r\n'):
+                    if line.startswith(b'Content-Length:'):
+                        content_length = int(line[15:])
                         break
-                        
-            except Exception as e:
-                if self.is_connected:
-                    logger.error(f"Error in receive loop: {e}")
+            
+            if len(buffer) < header_end + 4 + content_length:
+                # Wait for more data
                 break
+                
+            # We have a complete message
+            content_start = header_end + 4
+            content_end = content_start + content_length
+            
+            # Parse straight from the buffer; the view must be
+            # released before the buffer can be resized
+            try:
+                with memoryview(buffer)[content_start:content_end] as content:
+                    message = orjson.loads(content)
+            except orjson.JSONDecodeError as e:
+                message = None
+                logger.error("Failed to parse DAP message: %s", e)
+            
+            # Drop the consumed bytes in place
+            del buffer[:content_end]
+            
+            # Process the message
+            if message is not None:
+                self._handle_message(message)
+            
+            header_end = buffer.find(_HEADER_END)
+    
+    def _close_receive(self, sock: socket.socket):
+        """Stop receiving on a socket whose connection has ended."""
+        _get_dispatcher().unregister(sock)
+        if sock is self.socket:
+            self.is_connected = False
+            # No response can arrive any more, so wake waiters with an empty result
+            for index, slot in enumerate(self._slots):
+                if slot is not None:
+                    self._slots[index] = None
+                    slot.event.set()
     
     def _handle_message(self, message: Dict[str, Any]):
         """Handle a DAP message."""
@@ -266,9 +468,14 @@ class DAPClient:
         if msg_type == "response":
             # Handle response
             seq = message.get("request_seq")
-            if seq in self.pending_requests:
-                self.responses[seq] = message
-                self.pending_requests[seq].set()
+            if isinstance(seq, int):
+                index = seq & _RING_MASK
+                slot = self._slots[index]
+                if slot is not None and slot.seq == seq:
+                    self._slots[index] = None
+                    # Publish the result before waking the waiter
+                    slot.result = message
+                    slot.event.set()
                 
         elif msg_type == "event":
             # Handle event
@@ -278,7 +485,7 @@ class DAPClient:
             
             # Log important events
             if event in ["stopped", "continued", "terminated", "exited"]:
-                logger.info(f"DAP Event: {event} - {message.get('body', {})}")
+                logger.info("DAP Event: %s - %s", event, message.get('body', {}))
     
     def on_event(self, event_name: str, callback: Callable):
         """Register an event callback."""
@@ -2,13 +2,14 @@
 Debugpy client wrapper for managing debugging sessions.
 """
 
-import json
+import functools
+import itertools
 import subprocess
 import time
 import threading
-import uuid
 import os
 import tempfile
+from types import CodeType
 from typing import Any, Dict, List, Optional, Tuple
 import logging
 
@@ -21,18 +22,78 @@ from .dap_client import DAPClient
 logger = logging.getLogger(__name__)
 
 
+def _decode_stack_frames(body: Dict[str, Any]) -> List[StackFrame]:
+    """Decode the body of a DAP stackTrace response.
+    
+    Fields the DAP schema marks as required are indexed directly; only the
+    optional ones fall back to defaults. The adapter is trusted, so models
+    are built with model_construct() and skip pydantic validation.
+    """
+    return [
+        StackFrame.model_construct(
+            frame_id=frame_data["id"],
+            name=frame_data["name"],
+            file_path=(frame_data.get("source") or {}).get("path", ""),
+            line_number=frame_data["line"],
+            column=frame_data.get("column")
+        )
+        for frame_data in body.get("stackFrames", ())
+    ]
+
+
+def _decode_variables(body: Dict[str, Any], scope_name: str) -> List[Variable]:
+    """Decode the body of a DAP variables response for one scope."""
+    return [
+        Variable.model_construct(
+            name=var_data["name"],
+            value=var_data["value"],
+            type=var_data.get("type", "unknown"),
+            scope=scope_name,
+            is_expandable=var_data.get("variablesReference", 0) > 0
+        )
+        for var_data in body.get("variables", ())
+    ]
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_condition(condition: str) -> CodeType:
+    """Compile a breakpoint condition, caching the result per source string."""
+    return compile(condition, "<breakpoint-condition>", "eval")
+
+
+def check_condition(condition: Optional[str]) -> Optional[str]:
+    """Return why a breakpoint condition is not a valid expression, or None if it is.
+    
+    None and blank conditions mean the breakpoint is unconditional.
+    """
+    if condition is None or not condition.strip():
+        return None
+    try:
+        _compile_condition(condition)
+    except (SyntaxError, ValueError) as e:
+        return f"Invalid breakpoint condition {condition!r}: {e}"
+    return None
+
+
 class DebugpyClient:
     """Client for communicating with debugpy debug adapters using proper DAP."""
     
     def __init__(self):
         self.sessions: Dict[str, DebugSession] = {}
         self.dap_clients: Dict[str, DAPClient] = {}
-        self.breakpoints: Dict[str, List[Breakpoint]] = {}
+        self.breakpoints: Dict[str, Dict[int, Breakpoint]] = {}
+        self._breakpoint_ids = itertools.count(1)
+        # setBreakpoints replaces a whole file's breakpoints, so concurrent
+        # updates to one session must not interleave. The lock is held across
+        # a DAP round trip, so each session gets its own
+        self._breakpoint_locks: Dict[str, threading.Lock] = {}
+        # Session IDs only key this client's dicts, so a counter is unique enough
+        self._session_ids = itertools.count(1)
         self.event_handlers = []
         
     def create_session(self, host: str = "localhost", port: int = 5678, timeout: int = 30) -> str:
         """Create a new debug session."""
-        session_id = str(uuid.uuid4())
+        session_id = f"session-{next(self._session_ids)}"
         session = DebugSession(
             session_id=session_id,
             host=host,
@@ -41,15 +102,16 @@ class DebugpyClient:
         )
         
         self.sessions[session_id] = session
-        self.breakpoints[session_id] = []
+        self.breakpoints[session_id] = {}
+        self._breakpoint_locks[session_id] = threading.Lock()
         
-        logger.info(f"Created debug session {session_id} for {host}:{port}")
+        logger.info("Created debug session %s for %s:%s", session_id, host, port)
         return session_id
     
     def connect_session(self, session_id: str) -> bool:
         """Connect to a debugpy session."""
         if session_id not in self.sessions:
-            logger.error(f"Session {session_id} not found")
+            logger.error("Session %s not found", session_id)
             return False
             
         session = self.sessions[session_id]
@@ -66,14 +128,14 @@ class DebugpyClient:
                 session.is_connected = True
                 session.status = "connected"
                 
-                logger.info(f"Connected to debug session {session_id}")
+                logger.info("Connected to debug session %s", session_id)
                 return True
             else:
                 session.status = "connection_failed"
                 return False
             
         except Exception as e:
-            logger.error(f"Failed to connect to session {session_id}: {e}")
+            logger.error("Failed to connect to session %s: %s", session_id, e)
             session.status = f"connection_failed: {e}"
             return False
     
@@ -91,77 +153,131 @@ class DebugpyClient:
             session.is_connected = False
             session.status = "disconnected"
             
-            logger.info(f"Disconnected from debug session {session_id}")
+            logger.info("Disconnected from debug session %s", session_id)
             return True
             
         except Exception as e:
-            logger.error(f"Error disconnecting session {session_id}: {e}")
+            logger.error("Error disconnecting session %s: %s", session_id, e)
             return False
     
     def set_breakpoint(self, session_id: str, file_path: str, line_number: int, 
                       condition: Optional[str] = None) -> Optional[Breakpoint]:
-        """Set a breakpoint in the target program."""
+        """Set a breakpoint in the target program.
+        
+        Raises ValueError if the condition is not a valid expression.
+        """
+        breakpoints = self.set_breakpoints_bulk(session_id, file_path, [(line_number, condition)])
+        return breakpoints[0] if breakpoints else None
+    
+    def set_breakpoints_bulk(self, session_id: str, file_path: str,
+                             lines: List[Tuple[int, Optional[str]]]) -> List[Breakpoint]:
+        """Set several breakpoints in one file with a single setBreakpoints request.
+        
+        DAP setBreakpoints replaces every breakpoint in the file, so the
+        request carries the file's existing breakpoints as well as the new
+        (line, condition) pairs. Breakpoints are merged by line: a new
+        condition replaces the old one and the existing ID is kept. Returns
+        one breakpoint per requested line, or an empty list if the request
+        failed. Raises ValueError if a condition is not a valid expression.
+        """
         if session_id not in self.sessions or not self.sessions[session_id].is_connected:
-            logger.error(f"Session {session_id} not connected")
-            return None
-            
-        try:
-            breakpoint_id = len(self.breakpoints[session_id]) + 1
-            
-            # Send setBreakpoints request
-            response = self._send_request(session_id, "setBreakpoints", {
-                "source": {"path": file_path},
-                "breakpoints": [{
-                    "line": line_number,
-                    "condition": condition
-                }]
-            })
-            
-            if response and response.get("success"):
-                breakpoint = Breakpoint(
-                    breakpoint_id=breakpoint_id,
-                    file_path=file_path,
-                    line_number=line_number,
-                    condition=condition
-                )
-                
-                self.breakpoints[session_id].append(breakpoint)
-                logger.info(f"Set breakpoint {breakpoint_id} at {file_path}:{line_number}")
-                return breakpoint
+            logger.error("Session %s not connected", session_id)
+            return []
+        
+        # A blank condition means none, rather than an expression debugpy evaluates
+        lines = [
+            (line_number, condition if condition and condition.strip() else None)
+            for line_number, condition in lines
+        ]
+        # Reject malformed conditions here rather than after a DAP round trip
+        for line_number, condition in lines:
+            error = check_condition(condition)
+            if error:
+                logger.error("%s", error)
+                raise ValueError(error)
+            
+        with self._breakpoint_locks[session_id]:
+            try:
+                by_line = {
+                    bp.line_number: bp for bp in self.breakpoints[session_id].values()
+                    if bp.file_path == file_path
+                }
+                # Later entries for the same line win
+                requested = dict(lines)
+                merged = {line_number: bp.condition for line_number, bp in by_line.items()}
+                merged.update(requested)
+            
+                # Send setBreakpoints request
+                response = self._send_request(session_id, "setBreakpoints", {
+                    "source": {"path": file_path},
+                    "breakpoints": [
+                        {"line": line_number, "condition": condition}
+                        for line_number, condition in merged.items()
+                    ]
+                })
+            
+                if response and response.get("success"):
+                    created = []
+                    for line_number, condition in requested.items():
+                        existing = by_line.get(line_number)
+                        breakpoint = Breakpoint(
+                            breakpoint_id=existing.breakpoint_id if existing else next(self._breakpoint_ids),
+                            file_path=file_path,
+                            line_number=line_number,
+                            condition=condition
+                        )
+                    
+                        self.breakpoints[session_id][breakpoint.breakpoint_id] = breakpoint
+                        logger.info("Set breakpoint %s at %s:%s", breakpoint.breakpoint_id, file_path, line_number)
+                        created.append(breakpoint)
+                    return created
                 
-        except Exception as e:
-            logger.error(f"Failed to set breakpoint: {e}")
+            except Exception as e:
+                logger.error("Failed to set breakpoints: %s", e)
             
-        return None
+            return []
     
     def clear_breakpoint(self, session_id: str, breakpoint_id: int) -> bool:
         """Clear a breakpoint."""
-        if session_id not in self.breakpoints:
+        lock = self._breakpoint_locks.get(session_id)
+        if lock is None:
             return False
+        
+        with lock:
+            breakpoints = self.breakpoints.get(session_id)
+            if not breakpoints or breakpoint_id not in breakpoints:
+                return False
             
-        breakpoints = self.breakpoints[session_id]
-        for i, bp in enumerate(breakpoints):
-            if bp.breakpoint_id == breakpoint_id:
-                # Send clearBreakpoints request
-                try:
-                    self._send_request(session_id, "setBreakpoints", {
-                        "source": {"path": bp.file_path},
-                        "breakpoints": []
-                    })
-                    
-                    breakpoints.pop(i)
-                    logger.info(f"Cleared breakpoint {breakpoint_id}")
+            bp = breakpoints[breakpoint_id]
+            # setBreakpoints replaces every breakpoint in the file, so resend the survivors
+            remaining = [
+                other for other in breakpoints.values()
+                if other.file_path == bp.file_path and other.breakpoint_id != breakpoint_id
+            ]
+            try:
+                response = self._send_request(session_id, "setBreakpoints", {
+                    "source": {"path": bp.file_path},
+                    "breakpoints": [
+                        {"line": other.line_number, "condition": other.condition}
+                        for other in remaining
+                    ]
+                })
+            
+                # Keep the local entry unless debugpy actually dropped it
+                if response and response.get("success"):
+                    del breakpoints[breakpoint_id]
+                    logger.info("Cleared breakpoint %s", breakpoint_id)
                     return True
-                    
-                except Exception as e:
-                    logger.error(f"Failed to clear breakpoint: {e}")
-                    
-        return False
+            
+            except Exception as e:
+                logger.error("Failed to clear breakpoint: %s", e)
+            
+            return False
     
     def continue_execution(self, session_id: str) -> bool:
         """Continue program execution."""
         if session_id not in self.dap_clients:
-            logger.error(f"No DAP client for session {session_id}")
+            logger.error("No DAP client for session %s", session_id)
             return False
             
         try:
@@ -170,7 +286,7 @@ class DebugpyClient:
             return response and response.get("success", True)
             
         except Exception as e:
-            logger.error(f"Failed to continue execution: {e}")
+            logger.error("Failed to continue execution: %s", e)
             return False
     
     def step_over(self, session_id: str) -> bool:
@@ -184,7 +300,7 @@ class DebugpyClient:
             return response and response.get("success", True)
             
         except Exception as e:
-            logger.error(f"Failed to step over: {e}")
+            logger.error("Failed to step over: %s", e)
             return False
     
     def step_into(self, session_id: str) -> bool:
@@ -198,7 +314,7 @@ class DebugpyClient:
             return response and response.get("success", True)
             
         except Exception as e:
-            logger.error(f"Failed to step into: {e}")
+            logger.error("Failed to step into: %s", e)
             return False
     
     def step_out(self, session_id: str) -> bool:
@@ -212,7 +328,7 @@ class DebugpyClient:
             return response and response.get("success", True)
             
         except Exception as e:
-            logger.error(f"Failed to step out: {e}")
+            logger.error("Failed to step out: %s", e)
             return False
     
     def get_stack_trace(self, session_id: str) -> List[StackFrame]:
@@ -223,21 +339,10 @@ class DebugpyClient:
             })
             
             if response and response.get("success"):
-                frames = []
-                for frame_data in response.get("body", {}).get("stackFrames", []):
-                    frame = StackFrame(
-                        frame_id=frame_data.get("id"),
-                        name=frame_data.get("name"),
-                        file_path=frame_data.get("source", {}).get("path", ""),
-                        line_number=frame_data.get("line"),
-                        column=frame_data.get("column")
-                    )
-                    frames.append(frame)
-                
-                return frames
+                return _decode_stack_frames(response.get("body", {}))
                 
         except Exception as e:
-            logger.error(f"Failed to get stack trace: {e}")
+            logger.error("Failed to get stack trace: %s", e)
             
         return []
     
@@ -248,36 +353,70 @@ class DebugpyClient:
             scopes_response = self._send_request(session_id, "scopes", {
                 "frameId": frame_id
             })
+            return self._get_scope_variables(session_id, scopes_response)
             
-            if not scopes_response or not scopes_response.get("success"):
-                return []
+        except Exception as e:
+            logger.error("Failed to get variables: %s", e)
+            return []
+    
+    def _get_scope_variables(self, session_id: str,
+                             scopes_response: Optional[Dict[str, Any]]) -> List[Variable]:
+        """Fetch the variables of every scope in a DAP scopes response."""
+        if not scopes_response or not scopes_response.get("success"):
+            return []
+        
+        # Fetch every scope's variables in one pipelined submission
+        scopes = [
+            scope for scope in scopes_response.get("body", {}).get("scopes", [])
+            if scope.get("variablesReference")
+        ]
+        vars_responses = self._send_requests(session_id, [
+            ("variables", {"variablesReference": scope["variablesReference"]})
+            for scope in scopes
+        ])
+        
+        variables = []
+        for scope, vars_response in zip(scopes, vars_responses):
+            scope_name = scope.get("name", "unknown")
             
-            variables = []
-            for scope in scopes_response.get("body", {}).get("scopes", []):
-                scope_name = scope.get("name", "unknown")
-                variables_ref = scope.get("variablesReference")
-                
-                if variables_ref:
-                    vars_response = self._send_request(session_id, "variables", {
-                        "variablesReference": variables_ref
-                    })
-                    
-                    if vars_response and vars_response.get("success"):
-                        for var_data in vars_response.get("body", {}).get("variables", []):
-                            variable = Variable(
-                                name=var_data.get("name"),
-                                value=var_data.get("value"),
-                                type=var_data.get("type", "unknown"),
-                                scope=scope_name,
-                                is_expandable=var_data.get("variablesReference", 0) > 0
-                            )
-                            variables.append(variable)
-            
-            return variables
+            if vars_response and vars_response.get("success"):
+                variables.extend(_decode_variables(vars_response.get("body", {}), scope_name))
+        
+        return variables
+    
+    def inspect_frame(self, session_id: str,
+                      frame_id: Optional[int] = None
+                      ) -> Tuple[Optional[int], List[StackFrame], List[Variable]]:
+        """Get the stack trace and one frame's variables in a single call.
+        
+        Defaults to the innermost frame. Returns the inspected frame ID, the
+        stack frames and the frame's variables; the variables are empty if
+        there is no frame.
+        """
+        if frame_id is None:
+            # scopes needs the innermost frame's ID from the stack trace
+            frames = self.get_stack_trace(session_id)
+            if frames:
+                frame_id = frames[0].frame_id
+            
+            variables = self.get_variables(session_id, frame_id) if frame_id is not None else []
+            return frame_id, frames, variables
+        
+        try:
+            # The frame is already known, so stackTrace and scopes go out together
+            stack_response, scopes_response = self._send_requests(session_id, [
+                ("stackTrace", {"threadId": 1}),
+                ("scopes", {"frameId": frame_id}),
+            ])
+            
+            frames = []
+            if stack_response and stack_response.get("success"):
+                frames = _decode_stack_frames(stack_response.get("body", {}))
+            return frame_id, frames, self._get_scope_variables(session_id, scopes_response)
             
         except Exception as e:
-            logger.error(f"Failed to get variables: {e}")
-            return []
+            logger.error("Failed to inspect frame: %s", e)
+            return frame_id, [], []
     
     def evaluate_expression(self, session_id: str, expression: str, 
                           frame_id: Optional[int] = None) -> ExpressionResult:
@@ -312,7 +451,7 @@ class DebugpyClient:
                 )
                 
         except Exception as e:
-            logger.error(f"Failed to evaluate expression: {e}")
+            logger.error("Failed to evaluate expression: %s", e)
             return ExpressionResult(
                 expression=expression,
                 result="",
@@ -323,71 +462,33 @@ class DebugpyClient:
     
     def _send_request(self, session_id: str, command: str, arguments: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Send a DAP request to the debug session."""
-        if session_id not in self.connections:
-            logger.error(f"No connection for session {session_id}")
+        dap_client = self.dap_clients.get(session_id)
+        if dap_client is None:
+            logger.error("No DAP client for session %s", session_id)
             return None
             
         try:
-            seq = self.sequence_number
-            self.sequence_number += 1
-            
-            request = {
-                "seq": seq,
-                "type": "request",
-                "command": command,
-                "arguments": arguments
-            }
-            
-            # Send request
-            message = json.dumps(request)
-            content_length = len(message.encode('utf-8'))
-            
-            sock = self.connections[session_id]
-            sock.send(f"Content-Length: {content_length}\r\n\r\n{message}".encode('utf-8'))
-            
-            # Read response
-            response = self._read_response(sock)
-            return response
+            # The DAP client's receive loop demuxes the response by request_seq
+            return dap_client._send_request(command, arguments)
             
         except Exception as e:
-            logger.error(f"Failed to send request {command}: {e}")
+            logger.error("Failed to send request %s: %s", command, e)
             return None
     
-    def _read_response(self, sock: socket.socket) -> Optional[Dict[str, Any]]:
-        """Read a DAP response from the socket."""
+    def _send_requests(self, session_id: str,
+                       requests: List[Tuple[str, Dict[str, Any]]]) -> List[Optional[Dict[str, Any]]]:
+        """Send several DAP requests to the debug session without waiting in between."""
+        dap_client = self.dap_clients.get(session_id)
+        if dap_client is None:
+            logger.error("No DAP client for session %s", session_id)
+            return [None] * len(requests)
+            
         try:
-            # Read headers
-            headers = {}
-            while True:
-                line = self._read_line(sock)
-                if line == "":
-                    break
-                    
-                if ":" in line:
-                    key, value = line.split(":", 1)
-                    headers[key.strip()] = value.strip()
-            
-            # Read content
-            content_length = int(headers.get("Content-Length", 0))
-            if content_length > 0:
-                content = sock.recv(content_length).decode('utf-8')
-                return json.loads(content)
-                
-        except Exception as e:
-            logger.error(f"Failed to read response: {e}")
+            return dap_client._send_requests(requests)
             
-        return None
-    
-    def _read_line(self, sock: socket.socket) -> str:
-        """Read a line from the socket."""
-        line = ""
-        while True:
-            char = sock.recv(1).decode('utf-8')
-            if char == '\n':
-                break
-            elif char != '\r':
-                line += char
-        return line
+        except Exception as e:
+            logger.error("Failed to send requests: %s", e)
+            return [None] * len(requests)
     
     def get_session(self, session_id: str) -> Optional[DebugSession]:
         """Get a debug session by ID."""
@@ -399,4 +500,8 @@ class DebugpyClient:
     
     def list_breakpoints(self, session_id: str) -> List[Breakpoint]:
         """List breakpoints for a session."""
-        return self.breakpoints.get(session_id, []) 
\ No newline at end of file
+        return list(self.breakpoints.get(session_id, {}).values())
+    
+    def count_breakpoints(self, session_id: str) -> int:
+        """Count breakpoints for a session without copying them into a list."""
+        return len(self.breakpoints.get(session_id, ()))
\ No newline at end of file
@@ -91,4 +91,47 @@ class DebugResponse(BaseModel):
     success: bool = Field(..., description="Whether the command succeeded")
     message: str = Field(..., description="Response message")
     data: Optional[Dict[str, Any]] = Field(default=None, description="Response data")
-    error: Optional[str] = Field(default=None, description="Error message if command failed") 
\ No newline at end of file
+    error: Optional[str] = Field(default=None, description="Error message if command failed")
+
+
+class SessionsResponse(BaseModel):
+    """Model for the list_debug_sessions tool response."""
+    success: bool = Field(default=True, description="Whether the command succeeded")
+    sessions: List[DebugSession] = Field(..., description="All debug sessions")
+    count: int = Field(..., description="Number of sessions")
+
+
+class BreakpointsResponse(BaseModel):
+    """Model for the list_breakpoints tool response."""
+    success: bool = Field(default=True, description="Whether the command succeeded")
+    session_id: str = Field(..., description="Session the breakpoints belong to")
+    breakpoints: List[Breakpoint] = Field(..., description="Breakpoints set in the session")
+    count: int = Field(..., description="Number of breakpoints")
+
+
+class StackResponse(BaseModel):
+    """Model for the inspect_stack tool response."""
+    success: bool = Field(default=True, description="Whether the command succeeded")
+    session_id: str = Field(..., description="Session the stack belongs to")
+    stack_frames: List[StackFrame] = Field(..., description="Current call stack, innermost first")
+    frame_count: int = Field(..., description="Number of stack frames")
+
+
+class VariablesResponse(BaseModel):
+    """Model for the inspect_variables tool response."""
+    success: bool = Field(default=True, description="Whether the command succeeded")
+    session_id: str = Field(..., description="Session the frame belongs to")
+    frame_id: int = Field(..., description="Stack frame the variables were read from")
+    variables: List[Variable] = Field(..., description="Variables visible in the frame")
+    variable_count: int = Field(..., description="Number of variables")
+
+
+class FrameResponse(BaseModel):
+    """Model for the inspect_frame tool response."""
+    success: bool = Field(default=True, description="Whether the command succeeded")
+    session_id: str = Field(..., description="Session the frame belongs to")
+    frame_id: Optional[int] = Field(default=None, description="Stack frame the variables were read from")
+    stack_frames: List[StackFrame] = Field(..., description="Current call stack, innermost first")
+    frame_count: int = Field(..., description="Number of stack frames")
+    variables: List[Variable] = Field(..., description="Variables visible in the frame")
+    variable_count: int = Field(..., description="Number of variables")
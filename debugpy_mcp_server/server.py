@@ -6,48 +6,73 @@ A Model Context Protocol server providing debugging capabilities using debugpy.
 """
 
 import asyncio
-import json
+import functools
+import itertools
 import logging
 import os
 import sys
-from typing import Any, Dict, List, Optional
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
 
+import psutil
 from mcp.server.fastmcp import FastMCP
 
+from ._response import format_error, format_response, format_success, response_serializer
 from .debugpy_client import DebugpyClient
 from .models import (
-    DebugSession, Breakpoint, StackFrame, Variable,
-    ExpressionResult, SourceLocation, ProcessInfo
+    SessionsResponse, BreakpointsResponse, StackResponse,
+    VariablesResponse, FrameResponse
 )
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+# Bound once; every tool's exception path logs through it
+_log_error = logger.error
+
+class DebugpyFastMCP(FastMCP):
+    """FastMCP server that builds its tools/list response only once.
+    
+    The tool set is fixed once the module has been imported, so the Tool
+    objects FastMCP would otherwise rebuild on every tools/list request are
+    kept and reused until a tool is added or removed.
+    """
+    
+    _tool_list = None
+    
+    def add_tool(self, *args, **kwargs):
+        self._tool_list = None
+        return super().add_tool(*args, **kwargs)
+    
+    def remove_tool(self, *args, **kwargs):
+        self._tool_list = None
+        return super().remove_tool(*args, **kwargs)
+    
+    async def list_tools(self):
+        if self._tool_list is None:
+            self._tool_list = await super().list_tools()
+        return self._tool_list
 
 # Create the FastMCP server
-mcp = FastMCP("Debugpy MCP Server")
+mcp = DebugpyFastMCP("Debugpy MCP Server")
 
-# Global debugpy client instance
+# Global debugpy client instance. Its calls block on DAP round trips, so the
+# tools run them with asyncio.to_thread to keep the event loop free for
+# concurrent tool calls
 debugpy_client = DebugpyClient()
 
-def format_response(data: Any) -> str:
-    """Format response data for MCP tool output."""
-    try:
-        if hasattr(data, 'model_dump'):
-            return json.dumps(data.model_dump(), indent=2, ensure_ascii=False)
-        elif isinstance(data, (dict, list)):
-            return json.dumps(data, indent=2, ensure_ascii=False)
-        else:
-            return str(data)
-    except Exception as e:
-        return f"Error formatting response: {e}"
+# Serializers for the tools whose response model is known up front
+_serialize_sessions = response_serializer(SessionsResponse)
+_serialize_breakpoints = response_serializer(BreakpointsResponse)
+_serialize_stack = response_serializer(StackResponse)
+_serialize_variables = response_serializer(VariablesResponse)
+_serialize_frame = response_serializer(FrameResponse)
 
 # ============================================================================
 # DEBUG SESSION MANAGEMENT
 # ============================================================================
 
 @mcp.tool()
-def start_debug_session(host: str = "localhost", port: int = 5678, timeout: int = 30) -> str:
+async def start_debug_session(host: str = "localhost", port: int = 5678, timeout: int = 30) -> str:
     """
     Start a new debug session by connecting to a debugpy-enabled program.
     
@@ -64,25 +89,25 @@ def start_debug_session(host: str = "localhost", port: int = 5678, timeout: int
         session_id = debugpy_client.create_session(host, port, timeout)
         
         # Connect to the session
-        success = debugpy_client.connect_session(session_id)
+        success = await asyncio.to_thread(debugpy_client.connect_session, session_id)
         
         session = debugpy_client.get_session(session_id)
         
         result = {
             "success": success,
             "session_id": session_id,
-            "session": session.model_dump() if session else None,
+            "session": session,
             "message": f"Connected to debug session at {host}:{port}" if success else "Failed to connect"
         }
         
         return format_response(result)
         
     except Exception as e:
-        logger.error(f"Failed to start debug session: {e}")
-        return format_response({"success": False, "error": str(e)})
+        _log_error("Failed to start debug session: %s", e)
+        return format_error(e)
 
 @mcp.tool()
-def stop_debug_session(session_id: str) -> str:
+async def stop_debug_session(session_id: str) -> str:
     """
     Stop and disconnect from a debug session.
     
@@ -93,7 +118,7 @@ def stop_debug_session(session_id: str) -> str:
         JSON string with disconnection status
     """
     try:
-        success = debugpy_client.disconnect_session(session_id)
+        success = await asyncio.to_thread(debugpy_client.disconnect_session, session_id)
         
         result = {
             "success": success,
@@ -104,8 +129,8 @@ def stop_debug_session(session_id: str) -> str:
         return format_response(result)
         
     except Exception as e:
-        logger.error(f"Failed to stop debug session: {e}")
-        return format_response({"success": False, "error": str(e)})
+        _log_error("Failed to stop debug session: %s", e)
+        return format_error(e)
 
 @mcp.tool()
 def list_debug_sessions() -> str:
@@ -118,17 +143,14 @@ def list_debug_sessions() -> str:
     try:
         sessions = debugpy_client.list_sessions()
         
-        result = {
-            "success": True,
-            "sessions": [session.model_dump() for session in sessions],
-            "count": len(sessions)
-        }
-        
-        return format_response(result)
+        return _serialize_sessions(SessionsResponse(
+            sessions=sessions,
+            count=len(sessions)
+        ))
         
     except Exception as e:
-        logger.error(f"Failed to list debug sessions: {e}")
-        return format_response({"success": False, "error": str(e)})
+        _log_error("Failed to list debug sessions: %s", e)
+        return format_error(e)
 
 @mcp.tool()
 def get_session_status(session_id: str) -> str:
@@ -145,29 +167,23 @@ def get_session_status(session_id: str) -> str:
         session = debugpy_client.get_session(session_id)
         
         if session:
-            result = {
-                "success": True,
-                "session": session.model_dump(),
-                "breakpoints_count": len(debugpy_client.list_breakpoints(session_id))
-            }
-        else:
-            result = {
-                "success": False,
-                "error": f"Session {session_id} not found"
-            }
+            return format_success(
+                session=session,
+                breakpoints_count=debugpy_client.count_breakpoints(session_id)
+            )
         
-        return format_response(result)
+        return format_error(f"Session {session_id} not found")
         
     except Exception as e:
-        logger.error(f"Failed to get session status: {e}")
-        return format_response({"success": False, "error": str(e)})
+        _log_error("Failed to get session status: %s", e)
+        return format_error(e)
 
 # ============================================================================
 # BREAKPOINT MANAGEMENT
 # ============================================================================
 
 @mcp.tool()
-def set_breakpoint(session_id: str, file_path: str, line_number: int, condition: Optional[str] = None) -> str:
+async def set_breakpoint(session_id: str, file_path: str, line_number: int, condition: Optional[str] = None) -> str:
     """
     Set a breakpoint at the specified file and line.
     
@@ -181,28 +197,69 @@ def set_breakpoint(session_id: str, file_path: str, line_number: int, condition:
         JSON string with breakpoint information
     """
     try:
-        breakpoint = debugpy_client.set_breakpoint(session_id, file_path, line_number, condition)
+        breakpoint = await asyncio.to_thread(debugpy_client.set_breakpoint, session_id, file_path, line_number, condition)
         
         if breakpoint:
-            result = {
-                "success": True,
-                "breakpoint": breakpoint.model_dump(),
-                "message": f"Breakpoint set at {file_path}:{line_number}"
-            }
-        else:
-            result = {
-                "success": False,
-                "error": f"Failed to set breakpoint at {file_path}:{line_number}"
-            }
+            return format_success(
+                breakpoint=breakpoint,
+                message=f"Breakpoint set at {file_path}:{line_number}"
+            )
         
-        return format_response(result)
+        return format_error(f"Failed to set breakpoint at {file_path}:{line_number}")
         
+    except ValueError as e:
+        # An invalid condition, already logged by the client
+        return format_error(e)
+    except Exception as e:
+        _log_error("Failed to set breakpoint: %s", e)
+        return format_error(e)
+
+@mcp.tool()
+async def set_breakpoints(session_id: str, file_path: str, line_numbers: List[int],
+                    conditions: Optional[List[Optional[str]]] = None) -> str:
+    """
+    Set several breakpoints in one file with a single request.
+    
+    Args:
+        session_id: ID of the debug session
+        file_path: Path to the source file
+        line_numbers: Line numbers for the breakpoints
+        conditions: Optional conditions, matched to line_numbers by position
+    
+    Returns:
+        JSON string with the new breakpoints
+    """
+    try:
+        conditions = conditions or []
+        if not line_numbers:
+            return format_error("No line numbers given")
+        if len(conditions) > len(line_numbers):
+            return format_error(
+                f"Got {len(conditions)} conditions for {len(line_numbers)} line numbers"
+            )
+        lines = [
+            (line_number, conditions[i] if i < len(conditions) else None)
+            for i, line_number in enumerate(line_numbers)
+        ]
+        breakpoints = await asyncio.to_thread(debugpy_client.set_breakpoints_bulk, session_id, file_path, lines)
+        
+        if breakpoints:
+            return format_success(
+                breakpoints=breakpoints,
+                count=len(breakpoints)
+            )
+        
+        return format_error(f"Failed to set breakpoints in {file_path}")
+        
+    except ValueError as e:
+        # An invalid condition, already logged by the client
+        return format_error(e)
     except Exception as e:
-        logger.error(f"Failed to set breakpoint: {e}")
-        return format_response({"success": False, "error": str(e)})
+        _log_error("Failed to set breakpoints: %s", e)
+        return format_error(e)
 
 @mcp.tool()
-def clear_breakpoint(session_id: str, breakpoint_id: int) -> str:
+async def clear_breakpoint(session_id: str, breakpoint_id: int) -> str:
     """
     Clear a specific breakpoint.
     
@@ -214,7 +271,7 @@ def clear_breakpoint(session_id: str, breakpoint_id: int) -> str:
         JSON string with operation status
     """
     try:
-        success = debugpy_client.clear_breakpoint(session_id, breakpoint_id)
+        success = await asyncio.to_thread(debugpy_client.clear_breakpoint, session_id, breakpoint_id)
         
         result = {
             "success": success,
@@ -224,8 +281,8 @@ def clear_breakpoint(session_id: str, breakpoint_id: int) -> str:
         return format_response(result)
         
     except Exception as e:
-        logger.error(f"Failed to clear breakpoint: {e}")
-        return format_response({"success": False, "error": str(e)})
+        _log_error("Failed to clear breakpoint: %s", e)
+        return format_error(e)
 
 @mcp.tool()
 def list_breakpoints(session_id: str) -> str:
@@ -241,25 +298,22 @@ def list_breakpoints(session_id: str) -> str:
     try:
         breakpoints = debugpy_client.list_breakpoints(session_id)
         
-        result = {
-            "success": True,
-            "session_id": session_id,
-            "breakpoints": [bp.model_dump() for bp in breakpoints],
-            "count": len(breakpoints)
-        }
-        
-        return format_response(result)
+        return _serialize_breakpoints(BreakpointsResponse(
+            session_id=session_id,
+            breakpoints=breakpoints,
+            count=len(breakpoints)
+        ))
         
     except Exception as e:
-        logger.error(f"Failed to list breakpoints: {e}")
-        return format_response({"success": False, "error": str(e)})
+        _log_error("Failed to list breakpoints: %s", e)
+        return format_error(e)
 
 # ============================================================================
 # EXECUTION CONTROL
 # ============================================================================
 
 @mcp.tool()
-def continue_execution(session_id: str) -> str:
+async def continue_execution(session_id: str) -> str:
     """
     Continue program execution until next breakpoint or completion.
     
@@ -270,7 +324,7 @@ def continue_execution(session_id: str) -> str:
         JSON string with execution status
     """
     try:
-        success = debugpy_client.continue_execution(session_id)
+        success = await asyncio.to_thread(debugpy_client.continue_execution, session_id)
         
         result = {
             "success": success,
@@ -281,37 +335,43 @@ def continue_execution(session_id: str) -> str:
         return format_response(result)
         
     except Exception as e:
-        logger.error(f"Failed to continue execution: {e}")
-        return format_response({"success": False, "error": str(e)})
+        _log_error("Failed to continue execution: %s", e)
+        return format_error(e)
 
-@mcp.tool()
-def step_into(session_id: str) -> str:
-    """
-    Step into the next function call.
-    
-    Args:
-        session_id: ID of the debug session
-    
-    Returns:
-        JSON string with step status
-    """
+async def _step(step: Callable[[str], bool], session_id: str, message: str,
+                failure_message: str, action: str) -> str:
+    """Run one of the client's step methods and format the step tool response."""
     try:
-        success = debugpy_client.step_into(session_id)
+        success = await asyncio.to_thread(step, session_id)
         
         result = {
             "success": success,
             "session_id": session_id,
-            "message": "Stepped into function" if success else "Failed to step into function"
+            "message": message if success else failure_message
         }
         
         return format_response(result)
         
     except Exception as e:
-        logger.error(f"Failed to step into: {e}")
-        return format_response({"success": False, "error": str(e)})
+        _log_error("Failed to %s: %s", action, e)
+        return format_error(e)
 
 @mcp.tool()
-def step_over(session_id: str) -> str:
+async def step_into(session_id: str) -> str:
+    """
+    Step into the next function call.
+    
+    Args:
+        session_id: ID of the debug session
+    
+    Returns:
+        JSON string with step status
+    """
+    return await _step(debugpy_client.step_into, session_id, "Stepped into function",
+                       "Failed to step into function", "step into")
+
+@mcp.tool()
+async def step_over(session_id: str) -> str:
     """
     Step over the current line.
     
@@ -321,23 +381,11 @@ def step_over(session_id: str) -> str:
     Returns:
         JSON string with step status
     """
-    try:
-        success = debugpy_client.step_over(session_id)
-        
-        result = {
-            "success": success,
-            "session_id": session_id,
-            "message": "Stepped over line" if success else "Failed to step over line"
-        }
-        
-        return format_response(result)
-        
-    except Exception as e:
-        logger.error(f"Failed to step over: {e}")
-        return format_response({"success": False, "error": str(e)})
+    return await _step(debugpy_client.step_over, session_id, "Stepped over line",
+                       "Failed to step over line", "step over")
 
 @mcp.tool()
-def step_out(session_id: str) -> str:
+async def step_out(session_id: str) -> str:
     """
     Step out of the current function.
     
@@ -347,27 +395,15 @@ def step_out(session_id: str) -> str:
     Returns:
         JSON string with step status
     """
-    try:
-        success = debugpy_client.step_out(session_id)
-        
-        result = {
-            "success": success,
-            "session_id": session_id,
-            "message": "Stepped out of function" if success else "Failed to step out of function"
-        }
-        
-        return format_response(result)
-        
-    except Exception as e:
-        logger.error(f"Failed to step out: {e}")
-        return format_response({"success": False, "error": str(e)})
+    return await _step(debugpy_client.step_out, session_id, "Stepped out of function",
+                       "Failed to step out of function", "step out")
 
 # ============================================================================
 # INSPECTION TOOLS
 # ============================================================================
 
 @mcp.tool()
-def inspect_stack(session_id: str) -> str:
+async def inspect_stack(session_id: str) -> str:
     """
     Get the current call stack for the debug session.
     
@@ -378,23 +414,20 @@ def inspect_stack(session_id: str) -> str:
         JSON string with stack trace information
     """
     try:
-        frames = debugpy_client.get_stack_trace(session_id)
-        
-        result = {
-            "success": True,
-            "session_id": session_id,
-            "stack_frames": [frame.model_dump() for frame in frames],
-            "frame_count": len(frames)
-        }
+        frames = await asyncio.to_thread(debugpy_client.get_stack_trace, session_id)
         
-        return format_response(result)
+        return _serialize_stack(StackResponse(
+            session_id=session_id,
+            stack_frames=frames,
+            frame_count=len(frames)
+        ))
         
     except Exception as e:
-        logger.error(f"Failed to inspect stack: {e}")
-        return format_response({"success": False, "error": str(e)})
+        _log_error("Failed to inspect stack: %s", e)
+        return format_error(e)
 
 @mcp.tool()
-def inspect_variables(session_id: str, frame_id: int = 0) -> str:
+async def inspect_variables(session_id: str, frame_id: int = 0) -> str:
     """
     Inspect variables in the specified stack frame.
     
@@ -406,24 +439,49 @@ def inspect_variables(session_id: str, frame_id: int = 0) -> str:
         JSON string with variable information
     """
     try:
-        variables = debugpy_client.get_variables(session_id, frame_id)
+        variables = await asyncio.to_thread(debugpy_client.get_variables, session_id, frame_id)
         
-        result = {
-            "success": True,
-            "session_id": session_id,
-            "frame_id": frame_id,
-            "variables": [var.model_dump() for var in variables],
-            "variable_count": len(variables)
-        }
+        return _serialize_variables(VariablesResponse(
+            session_id=session_id,
+            frame_id=frame_id,
+            variables=variables,
+            variable_count=len(variables)
+        ))
         
-        return format_response(result)
+    except Exception as e:
+        _log_error("Failed to inspect variables: %s", e)
+        return format_error(e)
+
+@mcp.tool()
+async def inspect_frame(session_id: str, frame_id: Optional[int] = None) -> str:
+    """
+    Get the call stack and the variables of one frame in a single call.
+    
+    Args:
+        session_id: ID of the debug session
+        frame_id: ID of the stack frame to inspect (default: the innermost frame)
+    
+    Returns:
+        JSON string with stack trace and variable information
+    """
+    try:
+        frame_id, frames, variables = await asyncio.to_thread(debugpy_client.inspect_frame, session_id, frame_id)
+        
+        return _serialize_frame(FrameResponse(
+            session_id=session_id,
+            frame_id=frame_id,
+            stack_frames=frames,
+            frame_count=len(frames),
+            variables=variables,
+            variable_count=len(variables)
+        ))
         
     except Exception as e:
-        logger.error(f"Failed to inspect variables: {e}")
-        return format_response({"success": False, "error": str(e)})
+        _log_error("Failed to inspect frame: %s", e)
+        return format_error(e)
 
 @mcp.tool()
-def evaluate_expression(session_id: str, expression: str, frame_id: Optional[int] = None) -> str:
+async def evaluate_expression(session_id: str, expression: str, frame_id: Optional[int] = None) -> str:
     """
     Evaluate a Python expression in the debugging context.
     
@@ -436,19 +494,48 @@ def evaluate_expression(session_id: str, expression: str, frame_id: Optional[int
         JSON string with evaluation result
     """
     try:
-        result_obj = debugpy_client.evaluate_expression(session_id, expression, frame_id)
+        result_obj = await asyncio.to_thread(debugpy_client.evaluate_expression, session_id, expression, frame_id)
         
         result = {
             "success": not result_obj.is_error,
             "session_id": session_id,
-            "evaluation": result_obj.model_dump()
+            "evaluation": result_obj
         }
         
         return format_response(result)
         
     except Exception as e:
-        logger.error(f"Failed to evaluate expression: {e}")
-        return format_response({"success": False, "error": str(e)})
+        _log_error("Failed to evaluate expression: %s", e)
+        return format_error(e)
+
+@functools.lru_cache(maxsize=64)
+def _count_source_lines(file_path: str, mtime_ns: int, size: int) -> int:
+    """Count the lines in a file without decoding it.
+    
+    Cached separately from the windows so paging through one file reads
+    it in full only once.
+    """
+    count = 0
+    last = b"\n"
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            count += chunk.count(b"\n")
+            last = chunk[-1:]
+    # A final line without a trailing newline still counts
+    return count + (last != b"\n")
+
+@functools.lru_cache(maxsize=64)
+def _read_source_window(file_path: str, mtime_ns: int, size: int, start_line: int,
+                        end_line: int) -> Tuple[str, ...]:
+    """Read and decode lines [start_line, end_line) of a file.
+    
+    Reading stops at end_line; nothing past the window is read or decoded.
+    """
+    with open(file_path, 'rb') as f:
+        return tuple(
+            raw_line.decode('utf-8', 'replace').rstrip()
+            for raw_line in itertools.islice(f, start_line, end_line)
+        )
 
 @mcp.tool()
 def get_source_code(file_path: str, line_number: int, context_lines: int = 5) -> str:
@@ -465,110 +552,198 @@ def get_source_code(file_path: str, line_number: int, context_lines: int = 5) ->
     """
     try:
         if not os.path.exists(file_path):
-            return format_response({
-                "success": False,
-                "error": f"File not found: {file_path}"
-            })
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+            return format_error(f"File not found: {file_path}")
         
         start_line = max(0, line_number - context_lines - 1)
-        end_line = min(len(lines), line_number + context_lines)
+        end_line = max(start_line, line_number + context_lines)
+        
+        # mtime and size in the cache key invalidate entries when the file
+        # changes, even if an edit lands within the filesystem's mtime granularity
+        st = os.stat(file_path)
+        window = _read_source_window(
+            file_path, st.st_mtime_ns, st.st_size, start_line, end_line
+        )
+        total_lines = _count_source_lines(file_path, st.st_mtime_ns, st.st_size)
         
         source_lines = []
-        for i in range(start_line, end_line):
+        for i, content in enumerate(window, start_line + 1):
             source_lines.append({
-                "line_number": i + 1,
-                "content": lines[i].rstrip(),
-                "is_target": i + 1 == line_number
+                "line_number": i,
+                "content": content,
+                "is_target": i == line_number
             })
         
-        result = {
-            "success": True,
-            "file_path": file_path,
-            "target_line": line_number,
-            "context_lines": context_lines,
-            "source": source_lines,
-            "total_lines": len(lines)
-        }
-        
-        return format_response(result)
+        return format_success(
+            file_path=file_path,
+            target_line=line_number,
+            context_lines=context_lines,
+            source=source_lines,
+            total_lines=total_lines
+        )
         
     except Exception as e:
-        logger.error(f"Failed to get source code: {e}")
-        return format_response({"success": False, "error": str(e)})
+        _log_error("Failed to get source code: %s", e)
+        return format_error(e)
 
 # ============================================================================
 # PROCESS MANAGEMENT
 # ============================================================================
 
+# Substrings that mark a process as Python, and as already running debugpy
+_PYTHON_MARKER = 'python'
+_DEBUGPY_MARKER = 'debugpy'
+# Length at which the kernel truncates /proc/<pid>/comm
+_COMM_LENGTH = 15
+
+def _parse_listen_port(cmdline) -> Optional[int]:
+    """Find the port in debugpy's "--listen [host:]port" argument, if any.
+    
+    Accepts both the "--listen x" and "--listen=x" forms.
+    """
+    for i, arg in enumerate(cmdline):
+        if arg == '--listen':
+            addr = cmdline[i + 1] if i + 1 < len(cmdline) else ''
+        elif arg.startswith('--listen='):
+            addr = arg[len('--listen='):]
+        else:
+            continue
+        port = addr.rsplit(':', 1)[-1]
+        # isdigit() alone accepts digits such as '²' that int() rejects
+        return int(port) if port.isascii() and port.isdecimal() else None
+    return None
+
+def _iter_python_processes_psutil() -> Iterator[Tuple[int, str, Sequence[str]]]:
+    """Yield (pid, name, cmdline) for each Python process, using psutil."""
+    # Only names are read up front; the command line is read just for the
+    # Python processes that survive the name check
+    for proc in psutil.process_iter(['name']):
+        try:
+            name = proc.info['name']
+            if not name or _PYTHON_MARKER not in name.lower():
+                continue
+            
+            try:
+                cmdline = proc.cmdline() or ()
+            except (psutil.AccessDenied, psutil.ZombieProcess):
+                cmdline = ()
+            
+            yield proc.pid, name, cmdline
+            
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            continue
+
+def _iter_python_processes_procfs() -> Iterator[Tuple[int, str, Sequence[str]]]:
+    """Yield (pid, name, cmdline) for each Python process, reading /proc directly.
+    
+    Two small reads per candidate process instead of psutil's per-process
+    abstraction; processes that exit mid-scan are skipped.
+    """
+    for entry in os.scandir('/proc'):
+        if not entry.name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry.name}/comm', 'rb') as f:
+                name = f.read().rstrip(b'\n').decode('utf-8', 'replace')
+            # comm is cut to 15 characters, so a name that long may be
+            # hiding the marker until it is extended below
+            if len(name) < _COMM_LENGTH and _PYTHON_MARKER not in name.lower():
+                continue
+            
+            try:
+                with open(f'/proc/{entry.name}/cmdline', 'rb') as f:
+                    raw = f.read()
+            except PermissionError:
+                raw = b''
+            
+        except OSError:
+            continue
+        
+        # Each argument is NUL-terminated; a zombie or kernel thread has none.
+        # A process that rewrote its title (setproctitle) may separate them
+        # with spaces instead, so split the way psutil's cmdline() does
+        text = raw.decode('utf-8', 'replace')
+        sep = '\0' if text.endswith('\0') else ' '
+        if text.endswith(sep):
+            text = text[:-1]
+        cmdline = text.split(sep) if text else ()
+        if sep == '\0' and len(cmdline) == 1 and ' ' in text:
+            cmdline = text.split(' ')
+        
+        # Same rule psutil's name() uses to undo the truncation
+        if len(name) >= _COMM_LENGTH:
+            extended_name = os.path.basename(cmdline[0]) if cmdline else ''
+            if extended_name.startswith(name):
+                name = extended_name
+            if _PYTHON_MARKER not in name.lower():
+                continue
+        yield int(entry.name), name, cmdline
+
+# psutil works everywhere, but on Linux reading procfs directly is much cheaper
+if sys.platform.startswith('linux') and os.path.isdir('/proc'):
+    _iter_python_processes = _iter_python_processes_procfs
+else:
+    _iter_python_processes = _iter_python_processes_psutil
+
 @mcp.tool()
-def list_debuggable_processes() -> str:
+def list_debuggable_processes(include_command_line: bool = True) -> str:
     """
     List running Python processes that might be debuggable.
     
+    Args:
+        include_command_line: Whether to report each process's full command line (default: True)
+    
     Returns:
         JSON string with list of potentially debuggable processes
     """
     try:
-        import psutil
-        
         processes = []
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-            try:
-                proc_info = proc.info
-                if proc_info['name'] and 'python' in proc_info['name'].lower():
-                    cmdline = proc_info.get('cmdline', [])
-                    command_str = ' '.join(cmdline) if cmdline else ''
-                    
-                    # Check if debugpy is mentioned in command line
-                    is_debuggable = 'debugpy' in command_str
-                    debugpy_port = None
-                    
-                    # Try to extract debugpy port
-                    if is_debuggable and '--listen' in command_str:
-                        try:
-                            listen_idx = cmdline.index('--listen')
-                            if listen_idx + 1 < len(cmdline):
-                                addr = cmdline[listen_idx + 1]
-                                if ':' in addr:
-                                    debugpy_port = int(addr.split(':')[1])
-                        except (ValueError, IndexError):
-                            pass
-                    
-                    process_info = ProcessInfo(
-                        process_id=proc_info['pid'],
-                        name=proc_info['name'],
-                        command_line=command_str,
-                        is_debuggable=is_debuggable,
-                        debugpy_port=debugpy_port
-                    )
-                    
-                    processes.append(process_info)
-                    
-            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                continue
-        
-        result = {
-            "success": True,
-            "processes": [proc.model_dump() for proc in processes],
-            "total_count": len(processes),
-            "debuggable_count": len([p for p in processes if p.is_debuggable])
-        }
+        debuggable_count = 0
+        for pid, name, cmdline in _iter_python_processes():
+            # Check if debugpy is mentioned in command line
+            is_debuggable = any(_DEBUGPY_MARKER in arg for arg in cmdline)
+            
+            # Try to extract debugpy port
+            debugpy_port = _parse_listen_port(cmdline) if is_debuggable else None
+            
+            debuggable_count += is_debuggable
+            processes.append({
+                "process_id": pid,
+                "name": name,
+                # Only join the arguments when the caller wants them reported
+                "command_line": ' '.join(cmdline) if include_command_line else None,
+                "is_debuggable": is_debuggable,
+                "debugpy_port": debugpy_port
+            })
         
-        return format_response(result)
+        # The entries are built here from process data, so they skip ProcessInfo
+        # validation and go straight to orjson as plain dicts
+        return format_success(
+            processes=processes,
+            total_count=len(processes),
+            debuggable_count=debuggable_count
+        )
         
     except Exception as e:
-        logger.error(f"Failed to list debuggable processes: {e}")
-        return format_response({"success": False, "error": str(e)})
+        _log_error("Failed to list debuggable processes: %s", e)
+        return format_error(e)
 
 # ============================================================================
 # MAIN ENTRY POINT
 # ============================================================================
 
-def main():
-    """Main entry point for the debugpy MCP server."""
+# Standard level names, looked up without going through the logging module
+_LOG_LEVELS = {
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+    "CRITICAL": logging.CRITICAL,
+}
+
+@functools.lru_cache(maxsize=None)
+def _build_parser():
+    """Build the command-line parser once, on first use."""
+    # argparse is only needed when running as a script, not when tools are imported
     import argparse
     
     parser = argparse.ArgumentParser(description="Debugpy MCP Server")
@@ -577,18 +752,22 @@ def main():
     parser.add_argument("--host", default="localhost", help="Host to bind to")
     parser.add_argument("--port", type=int, default=8000, help="Port to bind to")
     parser.add_argument("--log-level", default="INFO", help="Logging level")
-    
-    args = parser.parse_args()
+    return parser
+
+def main():
+    """Main entry point for the debugpy MCP server."""
+    args = _build_parser().parse_args()
     
     # Set logging level
-    logging.getLogger().setLevel(getattr(logging, args.log_level.upper()))
+    level_name = args.log_level.upper()
+    logging.getLogger().setLevel(_LOG_LEVELS.get(level_name) or getattr(logging, level_name))
     
     if args.mode == "stdio":
         # Run as stdio MCP server for MCP clients
         mcp.run()
     else:
         # Run as HTTP server
-        logger.info(f"Starting Debugpy MCP Server on {args.host}:{args.port}")
+        logger.info("Starting Debugpy MCP Server on %s:%s", args.host, args.port)
         mcp.run(host=args.host, port=args.port)
 
 if __name__ == "__main__":
@@ -8,15 +8,15 @@ import debugpy
 import time
 import signal
 import sys
+import threading
 
-# Global flag to control the main loop
-keep_running = True
+# Set to stop the main loop; waits on it wake up as soon as a signal arrives
+stop_event = threading.Event()
 
 def signal_handler(sig, frame):
     """Handle script termination and cleanup debugpy."""
-    global keep_running
     print("\nReceived interrupt signal. Stopping main loop...")
-    keep_running = False
+    stop_event.set()
 
 def fibonacci_sequence(n):
     """Generate fibonacci sequence up to n terms."""
@@ -30,11 +30,11 @@ def fibonacci_sequence(n):
     return sequence
 
 def factorial(n):
-    """Calculate factorial of n."""
-    if n <= 1:
-        return 1
-    else:
-        return n * factorial(n - 1)
+    """Calculate factorial of n iteratively, so stepping stays quick."""
+    result = 1
+    for i in range(2, n + 1):
+        result *= i
+    return result
 
 def process_numbers(numbers):
     """Process a list of numbers with various operations."""
@@ -80,7 +80,7 @@ def process_numbers(numbers):
 
 def interactive_menu():
     """Interactive menu for debugging demonstration."""
-    while keep_running:
+    while not stop_event.is_set():
         print("\n" + "="*50)
         print("INTERACTIVE DEBUGGING DEMO")
         print("="*50)
@@ -137,11 +137,7 @@ def interactive_menu():
                     
             elif choice == '5':
                 print("Waiting for 10 seconds... (perfect time to set breakpoints!)")
-                for i in range(10, 0, -1):
-                    print(f"  Waiting: {i} seconds remaining...")
-                    time.sleep(1)
-                    if not keep_running:
-                        break
+                stop_event.wait(10)
                 print("Wait completed!")
                 
             elif choice == '6':
@@ -160,8 +156,6 @@ def interactive_menu():
 
 def main():
     """Main function with debugpy setup."""
-    global keep_running
-    
     # Set up signal handlers for clean shutdown
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
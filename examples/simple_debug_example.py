@@ -19,11 +19,11 @@ def signal_handler(sig, frame):
     sys.exit(0)
 
 def calculate_fibonacci(n):
-    """Calculate fibonacci number."""
-    if n <= 1:
-        return n
-    else:
-        return calculate_fibonacci(n-1) + calculate_fibonacci(n-2)
+    """Calculate fibonacci number iteratively, so stepping stays quick."""
+    a, b = 0, 1
+    for i in range(n):
+        a, b = b, a + b
+    return a
 
 def main():
     # Set up signal handler for proper cleanup
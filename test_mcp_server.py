@@ -8,102 +8,505 @@ This script tests basic functionality without requiring a full MCP client.
 import sys
 import os
 import json
+import io
+from contextlib import redirect_stdout
+from functools import lru_cache
 
-# Add the debugpy_mcp_server package to the path
-sys.path.insert(0, os.path.dirname(__file__))
+# Load the debugpy_mcp_server package from this checkout directly rather
+# than putting the directory on sys.path, where every later import would
+# have to scan it too
+if "debugpy_mcp_server" not in sys.modules:
+    import importlib.util
+    _pkg_init = os.path.join(os.path.dirname(os.path.abspath(__file__)), "debugpy_mcp_server", "__init__.py")
+    _spec = importlib.util.spec_from_file_location(
+        "debugpy_mcp_server", _pkg_init,
+        submodule_search_locations=[os.path.dirname(_pkg_init)],
+    )
+    _pkg = importlib.util.module_from_spec(_spec)
+    sys.modules["debugpy_mcp_server"] = _pkg
+    _spec.loader.exec_module(_pkg)
+
+# Progress lines are printed unless MCP_TEST_VERBOSE=0 (e.g. for quiet CI
+# runs); failures are always printed
+_log = print if os.environ.get("MCP_TEST_VERBOSE", "1") != "0" else (lambda *a, **k: None)
+
+@lru_cache(maxsize=1)
+def _models():
+    """Load the models module once per interpreter."""
+    import debugpy_mcp_server.models as m
+    return m
 
-try:
-    from debugpy_mcp_server.models import DebugSession, Breakpoint, Variable
+@lru_cache(maxsize=1)
+def _client_class():
+    """Look up the DebugpyClient class once per interpreter."""
     from debugpy_mcp_server.debugpy_client import DebugpyClient
-    print("✓ Successfully imported debugpy MCP server modules")
-except ImportError as e:
-    print(f"✗ Failed to import modules: {e}")
-    sys.exit(1)
+    return DebugpyClient
 
-def test_models():
-    """Test that Pydantic models work correctly."""
-    print("\nTesting Pydantic models...")
+@lru_cache(maxsize=None)
+def _fixtures():
+    """Build the sample models once; later calls reuse the validated instances."""
+    m = _models()
     
     # Test DebugSession
-    session = DebugSession(
+    session = m.DebugSession(
         session_id="test-session",
         host="localhost",
         port=5678
     )
-    print(f"✓ Created DebugSession: {session.session_id}")
     
     # Test Breakpoint
-    breakpoint = Breakpoint(
+    breakpoint = m.Breakpoint(
         breakpoint_id=1,
         file_path="/test/file.py",
         line_number=10
     )
-    print(f"✓ Created Breakpoint: {breakpoint.file_path}:{breakpoint.line_number}")
     
     # Test Variable
-    variable = Variable(
+    variable = m.Variable(
         name="test_var",
         value="42",
         type="int",
         scope="local"
     )
-    print(f"✓ Created Variable: {variable.name} = {variable.value}")
+    return session, breakpoint, variable
+
+def test_models():
+    """Test that Pydantic models work correctly."""
+    _log("\nTesting Pydantic models...")
+    
+    # Imported here so a run only pays for the modules its tests use
+    try:
+        _models()
+    except ImportError as e:
+        print(f"✗ Failed to import models: {e}")
+        return False
+    
+    session, breakpoint, variable = _fixtures()
+    _log(f"✓ Created DebugSession: {session.session_id}")
+    _log(f"✓ Created Breakpoint: {breakpoint.file_path}:{breakpoint.line_number}")
+    _log(f"✓ Created Variable: {variable.name} = {variable.value}")
+    return True
 
 def test_debugpy_client():
     """Test DebugpyClient creation and basic methods."""
-    print("\nTesting DebugpyClient...")
+    _log("\nTesting DebugpyClient...")
+    
+    try:
+        DebugpyClient = _client_class()
+    except ImportError as e:
+        print(f"✗ Failed to import DebugpyClient: {e}")
+        return False
     
     client = DebugpyClient()
-    print("✓ Created DebugpyClient instance")
+    _log("✓ Created DebugpyClient instance")
     
     # Test session creation (without connecting)
     session_id = client.create_session("localhost", 5678)
-    print(f"✓ Created session: {session_id}")
+    _log(f"✓ Created session: {session_id}")
     
     # Test listing sessions
     sessions = client.list_sessions()
-    print(f"✓ Listed sessions: {len(sessions)} session(s)")
+    _log(f"✓ Listed sessions: {len(sessions)} session(s)")
     
     # Test getting session
     session = client.get_session(session_id)
     if session:
-        print(f"✓ Retrieved session: {session.session_id}")
+        _log(f"✓ Retrieved session: {session.session_id}")
     else:
         print("✗ Failed to retrieve session")
+        return False
+    return True
+
+def _connected_client(success=True):
+    """Return a client with one connected session whose requests are recorded.
+    
+    Requests never reach a debug adapter: each one is appended to the
+    returned list and answered with the given success flag.
+    """
+    client = _client_class()()
+    session_id = client.create_session("localhost", 5678)
+    client.sessions[session_id].is_connected = True
+    sent = []
+    
+    def send_request(sid, command, arguments):
+        sent.append((command, arguments))
+        return {"success": success}
+    
+    client._send_request = send_request
+    return client, session_id, sent
+
+def test_breakpoints():
+    """Test breakpoint bookkeeping against recorded setBreakpoints requests."""
+    _log("\nTesting breakpoint requests...")
+    
+    try:
+        _client_class()
+    except ImportError as e:
+        print(f"✗ Failed to import DebugpyClient: {e}")
+        return False
+    
+    ok = True
+    
+    # Clearing one breakpoint resends the rest of that file only
+    client, session_id, sent = _connected_client()
+    first = client.set_breakpoint(session_id, "/test/a.py", 10)
+    second = client.set_breakpoint(session_id, "/test/a.py", 20, "x > 1")
+    client.set_breakpoint(session_id, "/test/b.py", 5)
+    if client.clear_breakpoint(session_id, first.breakpoint_id) and sent[-1][1] == {
+        "source": {"path": "/test/a.py"},
+        "breakpoints": [{"line": 20, "condition": "x > 1"}],
+    } and first.breakpoint_id not in client.breakpoints[session_id]:
+        _log("✓ Cleared breakpoint and resent the surviving ones")
+    else:
+        print(f"✗ Unexpected clear request: {sent[-1]}")
+        ok = False
+    
+    # A failed clear leaves the breakpoint in place
+    client._send_request = lambda sid, command, arguments: {"success": False}
+    if not client.clear_breakpoint(session_id, second.breakpoint_id) \
+            and second.breakpoint_id in client.breakpoints[session_id]:
+        _log("✓ Failed clear kept the local breakpoint")
+    else:
+        print("✗ Failed clear dropped the local breakpoint")
+        ok = False
+    
+    client._send_request = lambda sid, command, arguments: None
+    if not client.clear_breakpoint(session_id, second.breakpoint_id) \
+            and second.breakpoint_id in client.breakpoints[session_id]:
+        _log("✓ Timed-out clear kept the local breakpoint")
+    else:
+        print("✗ Timed-out clear dropped the local breakpoint")
+        ok = False
+    
+    # Setting a line again, or twice in one call, merges by line and keeps the ID
+    client, session_id, sent = _connected_client()
+    first = client.set_breakpoint(session_id, "/test/a.py", 10)
+    merged = client.set_breakpoints_bulk(session_id, "/test/a.py", [(10, "a"), (20, None), (20, "b")])
+    if sent[-1][1]["breakpoints"] == [
+        {"line": 10, "condition": "a"}, {"line": 20, "condition": "b"},
+    ] and [(bp.line_number, bp.condition) for bp in merged] == [(10, "a"), (20, "b")] \
+            and merged[0].breakpoint_id == first.breakpoint_id \
+            and len(client.list_breakpoints(session_id)) == 2:
+        _log("✓ Merged repeated lines into one breakpoint each")
+    else:
+        print(f"✗ Unexpected merged request: {sent[-1]}")
+        ok = False
+    
+    client.clear_breakpoint(session_id, first.breakpoint_id)
+    if sent[-1][1]["breakpoints"] == [{"line": 20, "condition": "b"}]:
+        _log("✓ Clearing a merged line left no duplicate behind")
+    else:
+        print(f"✗ Unexpected clear request: {sent[-1]}")
+        ok = False
+    
+    # Conditions are compiled locally; a bad one raises before any request
+    client, session_id, sent = _connected_client()
+    if client.set_breakpoint(session_id, "/test/a.py", 10, "x % 2 == 0") and len(sent) == 1:
+        _log("✓ Accepted a valid condition")
+    else:
+        print("✗ Rejected a valid condition")
+        ok = False
+    try:
+        client.set_breakpoint(session_id, "/test/a.py", 20, "x %% (")
+    except ValueError as e:
+        if len(sent) == 1 and "Invalid breakpoint condition" in str(e):
+            _log("✓ Rejected an invalid condition without a request")
+        else:
+            print(f"✗ Unexpected rejection: {e}")
+            ok = False
+    else:
+        print("✗ Accepted an invalid condition")
+        ok = False
+    
+    # Empty and whitespace-only conditions are sent as unconditional breakpoints
+    blank = client.set_breakpoints_bulk(session_id, "/test/b.py", [(1, ""), (2, "  ")])
+    single = client.set_breakpoint(session_id, "/test/c.py", 3, " ")
+    if [bp.condition for bp in blank] == [None, None] and single and single.condition is None \
+            and [bp["condition"] for bp in sent[-2][1]["breakpoints"] + sent[-1][1]["breakpoints"]] == [None] * 3:
+        _log("✓ Sent blank conditions as no condition")
+    else:
+        print(f"✗ Unexpected blank condition handling: {sent[-2:]}")
+        ok = False
+    return ok
+
+def test_inspect_frame():
+    """Test that inspecting a known frame batches stackTrace with scopes."""
+    _log("\nTesting frame inspection...")
+    
+    try:
+        _client_class()
+    except ImportError as e:
+        print(f"✗ Failed to import DebugpyClient: {e}")
+        return False
+    
+    client, session_id, _ = _connected_client()
+    batches = []
+    
+    def send_requests(sid, requests):
+        batches.append([command for command, _ in requests])
+        return [{"success": True, "body": {}} for _ in requests]
+    
+    client._send_requests = send_requests
+    frame_id, frames, variables = client.inspect_frame(session_id, 7)
+    if frame_id == 7 and batches[0] == ["stackTrace", "scopes"]:
+        _log("✓ Sent stackTrace and scopes together for a given frame")
+        return True
+    print(f"✗ Unexpected request batches: {batches}")
+    return False
+
+def _refusing_adapter():
+    """Start a one-shot local adapter that answers initialize with success: false.
+    
+    Returns the port it listens on.
+    """
+    import socket
+    import threading
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(1)
+    
+    def serve():
+        conn, _ = listener.accept()
+        with conn, listener:
+            data = b""
+            while b"\r\n\r\n" not in data:
+                data += conn.recv(4096)
+            header, _, body = data.partition(b"\r\n\r\n")
+            length = int(header.split(b":")[1])
+            while len(body) < length:
+                body += conn.recv(4096)
+            request = json.loads(body[:length])
+            reply = json.dumps({
+                "seq": 1, "type": "response", "request_seq": request["seq"],
+                "command": request["command"], "success": False,
+            }).encode()
+            conn.sendall(b"Content-Length: %d\r\n\r\n" % len(reply) + reply)
+            conn.recv(4096)
+    
+    threading.Thread(target=serve, daemon=True).start()
+    return listener.getsockname()[1]
+
+def test_dap_connect_cleanup():
+    """Test that a failed DAP connect releases its socket."""
+    _log("\nTesting DAP connect cleanup...")
+    
+    try:
+        from debugpy_mcp_server import dap_client
+    except ImportError as e:
+        print(f"✗ Failed to import dap_client: {e}")
+        return False
+    
+    def registered(client):
+        return any(key.data is client for key in dap_client._get_dispatcher()._selector.get_map().values())
+    
+    ok = True
+    client = dap_client.DAPClient()
+    if not client.connect("127.0.0.1", _refusing_adapter(), 5) \
+            and client.socket is None and not registered(client):
+        _log("✓ Rejected initialize released the socket")
+    else:
+        print("✗ Rejected initialize left the socket registered")
+        ok = False
+    
+    # Nothing listens on a just-closed port, so connect() itself fails
+    import socket
+    probe = socket.socket()
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    client = dap_client.DAPClient()
+    if not client.connect("127.0.0.1", port, 5) and client.socket is None:
+        _log("✓ Refused connection released the socket")
+    else:
+        print("✗ Refused connection left the socket open")
+        ok = False
+    return ok
+
+def _check_server_tools(server):
+    """Exercise the tools' argument checks that need no debug adapter."""
+    import asyncio
+    ok = True
+    
+    def call(tool, *args):
+        return json.loads(asyncio.run(tool(*args)))
+    
+    for args, label in (
+        ((server.debugpy_client.create_session(), "/test/a.py", []), "empty line_numbers"),
+        ((server.debugpy_client.create_session(), "/test/a.py", [1], ["a", "b"]), "extra conditions"),
+    ):
+        result = call(server.set_breakpoints, *args)
+        if result.get("success") is False and "Failed to set" not in result.get("error", ""):
+            _log(f"✓ set_breakpoints rejected {label}")
+        else:
+            print(f"✗ set_breakpoints accepted {label}: {result}")
+            ok = False
+    
+    for cmdline, expected in (
+        (["python", "-m", "debugpy", "--listen", "0.0.0.0:5678", "app.py"], 5678),
+        (["python", "-m", "debugpy", "--listen=localhost:5679", "app.py"], 5679),
+        (["python", "-m", "debugpy", "--listen", "5680"], 5680),
+        (["python", "-m", "debugpy", "--listen", "[::1]:5681"], 5681),
+        (["python", "-m", "debugpy", "--listen", "host:²"], None),
+        (["python", "-m", "debugpy", "--listen"], None),
+        (["python", "app.py"], None),
+    ):
+        try:
+            port = server._parse_listen_port(cmdline)
+        except ValueError as e:
+            port = e
+        if port == expected:
+            _log(f"✓ Parsed listen port {port} from {' '.join(cmdline[3:]) or cmdline[-1]}")
+        else:
+            print(f"✗ Parsed {port!r} from {cmdline}, expected {expected}")
+            ok = False
+    
+    # Invalid conditions come back from the tools as errors, not failures
+    session_id = server.debugpy_client.create_session()
+    server.debugpy_client.sessions[session_id].is_connected = True
+    server.debugpy_client._send_request = lambda sid, command, arguments: {"success": True}
+    try:
+        results = (
+            call(server.set_breakpoint, session_id, "/test/a.py", 10, "x ==="),
+            call(server.set_breakpoints, session_id, "/test/a.py", [10, 20], [None, "x ==="]),
+        )
+        accepted = call(server.set_breakpoints, session_id, "/test/a.py", [10, 20], [None, "x == 1"])
+    finally:
+        del server.debugpy_client._send_request
+    if all("Invalid breakpoint condition" in result.get("error", "") for result in results) \
+            and accepted.get("count") == 2:
+        _log("✓ Breakpoint tools reported invalid conditions and accepted valid ones")
+    else:
+        print(f"✗ Unexpected condition handling: {results}, {accepted}")
+        ok = False
+    
+    # Both process scanners must agree, including on names that /proc/<pid>/comm
+    # truncates (a child run through a long-named link) and on a title
+    # rewritten setproctitle-style with spaces between the arguments
+    if os.path.isdir("/proc"):
+        import subprocess
+        import tempfile
+        import time
+        retitle = (
+            "import sys\n"
+            "stat = open('/proc/self/stat').read().rsplit(')', 1)[1].split()\n"
+            "start, end = int(stat[45]), int(stat[46])\n"
+            "with open('/proc/self/mem', 'r+b', buffering=0) as mem:\n"
+            "    mem.seek(start)\n"
+            "    args = mem.read(end - start - 1)\n"
+            "    mem.seek(start)\n"
+            "    mem.write(args.replace(b'\\0', b' '))\n"
+            "print(flush=True)\n"
+            "sys.stdin.read()\n"
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            long_python = os.path.join(tmp, "python-with-a-long-name")
+            os.symlink(sys.executable, long_python)
+            child = subprocess.Popen([long_python, "-c", "import sys; sys.stdin.read()"],
+                                     stdin=subprocess.PIPE)
+            retitled = subprocess.Popen([sys.executable, "-c", retitle],
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL)
+            try:
+                pids = {os.getpid(), child.pid}
+                # Some kernels refuse writes to /proc/self/mem; skip that case there
+                if retitled.stdout.readline():
+                    pids.add(retitled.pid)
+                # A freshly spawned child may still be exec'ing; wait for its name
+                for _ in range(100):
+                    scanned = {
+                        pid: (name, list(cmdline))
+                        for pid, name, cmdline in server._iter_python_processes_procfs()
+                        if pid in pids
+                    }
+                    if scanned.get(child.pid, ("",))[0] == "python-with-a-long-name":
+                        break
+                    time.sleep(0.02)
+                expected = {
+                    pid: (name, list(cmdline))
+                    for pid, name, cmdline in server._iter_python_processes_psutil()
+                    if pid in pids
+                }
+            finally:
+                child.communicate()
+                retitled.communicate()
+        if scanned == expected and len(scanned) == len(pids):
+            _log("✓ procfs and psutil scanners report the same processes")
+        else:
+            print(f"✗ Scanners disagree: procfs {scanned}, psutil {expected}")
+            ok = False
+    
+    # The cached tools/list must follow tools being added and removed
+    tools = server.DebugpyFastMCP("tool-cache-test")
+    
+    def tool_names():
+        return [tool.name for tool in asyncio.run(tools.list_tools())]
+    
+    def first_tool() -> str:
+        return ""
+    
+    def second_tool() -> str:
+        return ""
+    
+    tools.add_tool(first_tool)
+    before = tool_names()
+    tools.add_tool(second_tool)
+    added = tool_names()
+    tools.remove_tool("first_tool")
+    removed = tool_names()
+    if before == ["first_tool"] and added == ["first_tool", "second_tool"] and removed == ["second_tool"]:
+        _log("✓ Tool list cache follows add_tool and remove_tool")
+    else:
+        print(f"✗ Stale tool list: {before} -> {added} -> {removed}")
+        ok = False
+    return ok
 
 def test_server_imports():
     """Test that the server module can be imported."""
-    print("\nTesting server module imports...")
+    _log("\nTesting server module imports...")
     
     try:
         # This will test if all dependencies are available
         from debugpy_mcp_server import server
-        print("✓ Successfully imported server module")
+        _log("✓ Successfully imported server module")
         
         # Test that MCP tools are defined
         if hasattr(server, 'mcp'):
-            print("✓ MCP server instance found")
+            _log("✓ MCP server instance found")
         else:
             print("✗ MCP server instance not found")
+            return False
             
     except ImportError as e:
         print(f"✗ Failed to import server module: {e}")
+        return False
+    
+    return _check_server_tools(server)
 
 def main():
     """Run all tests."""
-    print("Debugpy MCP Server Tests")
-    print("=" * 40)
-    
-    test_models()
-    test_debugpy_client()
-    test_server_imports()
-    
-    print("\n" + "=" * 40)
-    print("All tests completed!")
-    print("\nTo start the MCP server, run:")
-    print("  python -m debugpy_mcp_server.server")
-    print("\nTo test with a debug target, run:")
-    print("  python examples/test_program.py")
+    _log("Debugpy MCP Server Tests")
+    _log("=" * 40)
+    
+    # Collect each test's status lines and write them out in one go
+    results = []
+    for test in (test_models, test_debugpy_client, test_breakpoints, test_inspect_frame,
+                 test_dap_connect_cleanup, test_server_imports):
+        buf = io.StringIO()
+        try:
+            with redirect_stdout(buf):
+                results.append(test())
+        finally:
+            sys.stdout.write(buf.getvalue())
+    
+    _log("\n" + "=" * 40)
+    if not all(results):
+        print("Some tests failed.")
+        sys.exit(1)
+    _log("All tests completed!")
+    _log("\nTo start the MCP server, run:")
+    _log("  python -m debugpy_mcp_server.server")
+    _log("\nTo test with a debug target, run:")
+    _log("  python examples/test_program.py")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file